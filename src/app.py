@@ -1,11 +1,74 @@
 # esp_fancontrol/app.py
-import os, json, time, threading
+import os, json, time, threading, copy, re, subprocess, socket, functools, bisect, operator, math, hashlib, queue, atexit, signal
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Sequence, Tuple, Optional
 
 from flask import Flask, request, redirect, url_for, send_file, render_template, jsonify
 import paho.mqtt.client as mqtt
 
+# orjson is much faster for the indented/sorted config JSON; stdlib json is the fallback
+try:
+    import orjson
+
+    _ORJSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+    # orjson reads integers beyond 64 bit (19+ digits) back as floats; leave those documents to stdlib json.
+    # Spotted by mapping digits to "0" and the rest to " " - much cheaper than a regex scan
+    _DIGIT_MAP = bytes(48 if 48 <= i <= 57 else 32 for i in range(256))
+    _LONG_DIGIT_RUN = b"0" * 19
+
+    def _has_nonfinite(obj: Any) -> bool:
+        if isinstance(obj, float):
+            return not math.isfinite(obj)
+        if isinstance(obj, dict):
+            return any(_has_nonfinite(v) for v in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return any(_has_nonfinite(v) for v in obj)
+        return False
+
+    def _orjson_dump(obj: Any) -> Optional[bytes]:
+        # None where stdlib json must do it: orjson refuses ints beyond 64 bit and writes NaN/Infinity
+        # as null. Only a document containing null needs the (slower) walk for the latter.
+        try:
+            out = orjson.dumps(obj, option=_ORJSON_OPTS)
+        except TypeError:
+            return None
+        if b"null" in out and _has_nonfinite(obj):
+            return None
+        return out
+
+    def _dumps(obj: Any) -> str:
+        out = _orjson_dump(obj)
+        if out is not None:
+            return out.decode("utf-8")
+        return json.dumps(obj, indent=2, sort_keys=True)
+
+    def _dump_bytes(obj: Any) -> bytes:
+        # config.json file contents, ready for atomic_write
+        out = _orjson_dump(obj)
+        if out is not None:
+            return out + b"\n"
+        return (json.dumps(obj, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+    def _loads(data: Any) -> Any:
+        raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else data
+        if _LONG_DIGIT_RUN in raw.translate(_DIGIT_MAP):
+            return json.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Files written by stdlib json may contain NaN/Infinity, which orjson rejects
+            return json.loads(data)
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, sort_keys=True)
+
+    def _dump_bytes(obj: Any) -> bytes:
+        return (json.dumps(obj, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+    _loads = json.loads
+
 APP_NAME = "onAir_fanControl"
 # /config is the Volume Mount for user data.
 CONFIG_DIR = "/config"
@@ -53,7 +116,17 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "all_spun_down": {"enabled": True, "after_pwm": 15},
 }
 
+TOPIC_KEYS = ("target_pwm", "min_pwm", "max_pwm", "max_temp", "spinning_disks", "updated_at", "bias_limit")
+
+# Top-level config sections that are dicts (merged key by key with their defaults)
+_TOP_DICT_KEYS = frozenset(("mqtt", "topics", "limits", "unraid_disks_ini", "all_spun_down"))
+
 DISKS_INI_DEFAULT_PATH = "/host/disks.ini"
+# Numeric part of a disks.ini temp value like "38" or "38 C"
+_TEMP_RE = re.compile(r"(\d+\.?\d*)")
+# disks.ini section header ["name"] and the per-disk keys we use (everything else is skipped undecoded)
+_SECTION_RE = re.compile(rb'\["([^"]*)"\]')
+_INI_KEYS = frozenset((b"rotational", b"spundown", b"temp", b"temperature", b"device"))
 
 app = Flask(
     __name__,
@@ -75,50 +148,108 @@ state: Dict[str, Any] = {
     "updated_at": None,
     "updated_age_s": None,
     "esp_online": False,
-    "history": [], # list of {"ts": int, "temp": float, "pwm": int}
+    "history": deque(maxlen=60), # {"ts": int, "temp": float, "pwm": int}, max 60 samples (~30 min)
 }
+# Read-only view for the UI: (seq, mqtt_connected, history, status). Writers build a new tuple and
+# rebind it, so request handlers get a consistent view with one load and no lock. Never mutate it.
+# seq only moves when something in it changed; with _log_seq it makes the /api/status ETag
+_snapshot: Tuple[int, bool, Tuple[Dict[str, Any], ...], Dict[str, Any]] = (
+    0, False, (), dict(state, history=(), updated_at_human="None"))
+_log_seq = 0
+# Keeps ETags from a previous run from matching after a restart
+_ETAG_BOOT = f"{int(time.time()):x}"
 
 log_lock = threading.Lock()
-log_lines: List[str] = []
+# Only the tail shown in the UI is kept
+LOG_TAIL_LINES = 120
+log_lines: deque = deque(maxlen=LOG_TAIL_LINES)
 _smart_permission_warned = False
 
+_smart_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="smartctl")
+
+# Parsed config, keyed by config.json mtime/size so unchanged files are not re-parsed
+_cfg_lock = threading.Lock()
+# "pending" is the seq of a queued write not on disk yet; until it lands the cache is authoritative
+_cfg_cache: Dict[str, Any] = {"mtime_ns": None, "size": None, "cfg": None, "hash": None, "pending": None}
+
+# config.json writes from the UI go through a background writer (fsync is slow on some disks)
+_save_q: "queue.Queue[Optional[Tuple[int, str, bytes]]]" = queue.Queue(maxsize=4)
+_save_seq = 0
+_save_thread: Optional[threading.Thread] = None
+
 
 def log(msg: str) -> None:
+    global _log_seq
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"{ts} {msg}"
     with log_lock:
         log_lines.append(line)
-        del log_lines[:-500]
-
-
-def _deep_merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
-    out = dict(a)
-    for k, v in (b or {}).items():
-        if isinstance(v, dict) and isinstance(out.get(k), dict):
-            out[k] = _deep_merge(out[k], v)
-        else:
-            out[k] = v
-    return out
+        _log_seq += 1
 
 
 def _ensure_config_file() -> None:
     os.makedirs(CONFIG_DIR, exist_ok=True)
     if not os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(DEFAULT_CONFIG, f, indent=2, sort_keys=True)
-            f.write("\n")
+        with open(CONFIG_PATH, "wb") as f:
+            f.write(_dump_bytes(DEFAULT_CONFIG))
 
 
 def load_config() -> Dict[str, Any]:
+    # Returns the shared cached dict - callers that modify it must copy it first
     _ensure_config_file()
     try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            raw = json.load(f)
+        st = os.stat(CONFIG_PATH)
+    except OSError:
+        st = None
+    with _cfg_lock:
+        if _cfg_cache["cfg"] is not None and (_cfg_cache["pending"] is not None or (
+                st is not None and st.st_mtime_ns == _cfg_cache["mtime_ns"] and st.st_size == _cfg_cache["size"])):
+            return _cfg_cache["cfg"]
+        cfg, digest = _load_config_uncached()
+        if st is not None:
+            _cfg_cache["mtime_ns"] = st.st_mtime_ns
+            _cfg_cache["size"] = st.st_size
+            _cfg_cache["cfg"] = cfg
+            _cfg_cache["hash"] = digest
+        return cfg
+
+
+def _reset_config_cache() -> None:
+    # Call with _cfg_lock held
+    _cfg_cache["mtime_ns"] = _cfg_cache["size"] = _cfg_cache["cfg"] = _cfg_cache["hash"] = None
+    _cfg_cache["pending"] = None
+
+
+def config_unchanged(payload: bytes) -> bool:
+    # True if payload is byte-for-byte what config.json holds (or is about to, for a queued save)
+    digest = _cfg_cache["hash"]
+    return digest is not None and hashlib.sha256(payload).digest() == digest
+
+
+# returns: (cfg, sha256 of the file contents or None if unreadable)
+def _load_config_uncached() -> Tuple[Dict[str, Any], Optional[bytes]]:
+    digest = None
+    try:
+        with open(CONFIG_PATH, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).digest()
+        raw = _loads(data)
         if not isinstance(raw, dict):
             raw = {}
-    except Exception:
+    except Exception as e:
+        log(f"config.json unreadable, using defaults: {e}")
         raw = {}
 
+    cfg, migrated = _normalize_config(raw)
+    # Falls wir im Speicher aufraeumen mussten, schreiben wir die Datei sofort sauber zurueck
+    if migrated:
+        atomic_write(CONFIG_PATH, _dump_bytes(cfg))
+        log("config.json migrated and cleaned (MQTT keys)")
+    return (cfg, digest)
+
+
+# returns: (cfg with defaults filled in and types fixed, whether legacy MQTT keys were migrated)
+def _normalize_config(raw: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
     # Backward compat: topics.base_pwm -> topics.target_pwm
     if "topics" in raw and isinstance(raw["topics"], dict):
         if "base_pwm" in raw["topics"] and "target_pwm" not in raw["topics"]:
@@ -128,7 +259,13 @@ def load_config() -> Dict[str, Any]:
     if "idle_when_all_spun_down" in raw and "all_spun_down" not in raw:
         raw["all_spun_down"] = raw.pop("idle_when_all_spun_down")
 
-    cfg = _deep_merge(DEFAULT_CONFIG, raw)
+    # Overlay onto the defaults - the config is only two levels deep
+    cfg = {k: (dict(v) if k in _TOP_DICT_KEYS else v) for k, v in DEFAULT_CONFIG.items()}
+    for k, v in raw.items():
+        if k in _TOP_DICT_KEYS and isinstance(v, dict):
+            cfg[k] = {**DEFAULT_CONFIG[k], **v}
+        else:
+            cfg[k] = v
 
     # MQTT
     mq = cfg.get("mqtt", {})
@@ -148,14 +285,9 @@ def load_config() -> Dict[str, Any]:
         "username": str(mq.get("username", "") or ""),
         "password": str(mq.get("password", "") or ""),
     }
-    
-    # Falls wir im Speicher aufraeumen mussten, schreiben wir die Datei sofort sauber zurueck
-    if migrated:
-        atomic_write(CONFIG_PATH, json.dumps(cfg, indent=2, sort_keys=True) + "\n")
-        log("config.json migrated and cleaned (MQTT keys)")
 
     # Topics (ensure strings)
-    for k in ("target_pwm", "min_pwm", "max_pwm", "max_temp", "spinning_disks", "updated_at", "bias_limit"):
+    for k in TOPIC_KEYS:
         if "topics" not in cfg: cfg["topics"] = {}
         # Fallback auf Default, falls der Key fehlt
         cfg["topics"][k] = str(cfg["topics"].get(k, DEFAULT_CONFIG["topics"].get(k, f"unraid/hdds/{k}")))
@@ -206,19 +338,116 @@ def load_config() -> Dict[str, Any]:
     pts.sort(key=lambda x: x["temp_c"])
     cfg["curve"] = pts
 
-    return cfg
+    return (cfg, migrated)
+
+
+def save_config(payload: bytes) -> None:
+    # Update the cache right away and leave the actual file write to _save_writer
+    global _save_seq, _save_thread
+    cfg, migrated = _normalize_config(_loads(payload))
+    if migrated:
+        payload = _dump_bytes(cfg)
+        log("config.json migrated and cleaned (MQTT keys)")
+    with _cfg_lock:
+        _save_seq += 1
+        _cfg_cache["cfg"] = cfg
+        _cfg_cache["hash"] = hashlib.sha256(payload).digest()
+        _cfg_cache["pending"] = _save_seq
+        if _save_thread is None:
+            _save_thread = threading.Thread(target=_save_writer, name="config-writer", daemon=True)
+            _save_thread.start()
+        _save_q_put((_save_seq, CONFIG_PATH, payload))
+    wake_event.set()
+
+
+def _save_q_put(item: Optional[Tuple[int, str, bytes]]) -> None:
+    # Queue full: drop the oldest write, a newer payload supersedes it anyway
+    while True:
+        try:
+            _save_q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                _save_q.get_nowait()
+            except queue.Empty:
+                pass
 
 
-def atomic_write(path: str, text: str) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        f.write(text)
-    os.replace(tmp, path)
+def _save_writer() -> None:
+    while True:
+        item = _save_q.get()
+        if item is None:
+            return
+        seq, path, payload = item
+        try:
+            atomic_write(path, payload)
+        except Exception as e:
+            log(f"config.json write failed: {e}")
+            with _cfg_lock:
+                # Fall back to whatever is on disk, unless a newer save is already queued
+                if _cfg_cache["pending"] == seq:
+                    _reset_config_cache()
+            continue
+        with _cfg_lock:
+            if _cfg_cache["pending"] == seq:
+                # Latest save is on disk: back to the mtime/size check
+                try:
+                    st = os.stat(path)
+                    _cfg_cache["mtime_ns"] = st.st_mtime_ns
+                    _cfg_cache["size"] = st.st_size
+                except OSError:
+                    _cfg_cache["cfg"] = None
+                _cfg_cache["pending"] = None
+
+
+@atexit.register
+def _flush_config_writes() -> None:
+    # Let queued config.json writes finish before exiting (docker stop gets here via _on_sigterm)
+    if _save_thread is not None:
+        _save_q_put(None)
+        _save_thread.join(timeout=10)
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    # Unique temp file (safe with concurrent writers), synced before the rename and the
+    # directory synced after it, so a power loss leaves either the old or the new file
+    tmp = f"{path}.tmp.{os.getpid()}.{os.urandom(4).hex()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        try:
+            # Unbuffered: normally a single write(2) for the whole file
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dfd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+    except OSError:
+        pass # some filesystems (e.g. FUSE shares) can't fsync a directory
 
 
 def human_ts(ts: Optional[int]) -> str:
     if not ts:
         return "None"
+    return _human_ts_cached(ts, TZ_NAME)
+
+
+# The UI asks for the same updated_at over and over, so keep the formatted strings around
+@functools.lru_cache(maxsize=256)
+def _human_ts_cached(ts: int, tz_name: str) -> str:
     try:
         dt = datetime.fromtimestamp(int(ts))
         # Get offset like +0100 or -0500
@@ -228,31 +457,50 @@ def human_ts(ts: Optional[int]) -> str:
             hours = int(offset[:3])
             tz_str = f"UTC{hours:+d}" if hours != 0 else "UTC"
         else:
-            tz_str = TZ_NAME
+            tz_str = tz_name
         return dt.strftime("%Y-%m-%d %H:%M:%S") + f" ({tz_str})"
     except Exception:
         return str(ts)
 
 
-# disks.ini parsing: include diskN + parity*, exclude cache/flash/transfer_cache by name + non-rotational
-# returns: (spinning_count, temps_seen, max_temp_or_None, file_mtime, source_string)
-def parse_disks_ini(path: str) -> Tuple[int, int, Optional[float], float, str]:
+def get_smart_temp(dev: str) -> Optional[float]:
+    global _smart_permission_warned
     try:
-        if not os.path.exists(path):
-            log(f"disks.ini not found at {path}")
-            return (0, 0, None, 0.0)
+        cmd = ["smartctl", "-n", "standby", "-A", f"/dev/{dev}"]
+        res = subprocess.run(cmd, capture_output=True, text=True, timeout=3)
         
-        mtime = os.path.getmtime(path)
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.read().splitlines()
+        if res.returncode != 0: 
+            # Check for permission denied symptoms (including silent failure rc=2 in restricted envs)
+            perm_issue = False
+            if "Permission denied" in res.stderr or "Operation not permitted" in res.stderr:
+                perm_issue = True
+            elif res.returncode == 2 and not res.stderr.strip():
+                # Silent failure with rc=2 often happens in unprivileged containers
+                perm_issue = True
+
+            if perm_issue and not _smart_permission_warned:
+                log(f"SMART: Query failed (rc={res.returncode}, stderr='{res.stderr.strip()}'). If this persists for active drives, check Docker privileges (needs --privileged and /dev mapping).")
+                _smart_permission_warned = True
+            return None
+        
+        for line in res.stdout.splitlines():
+            if "Temperature_Celsius" in line or "Airflow_Temperature_Cel" in line:
+                parts = line.split()
+                if len(parts) >= 10:
+                    try:
+                        return float(parts[9])
+                    except ValueError:
+                        continue
+        return None
     except Exception as e:
-        log(f"Error reading {path}: {e}")
-        return (0, 0, None, 0.0)
+        log(f"SMART error for {dev}: {e}")
+        return None
 
-    spinning = 0
-    temps_seen = 0
-    max_temp: Optional[float] = None
-    source_flags = set() # {"SMART", "INI"}
+
+# disks.ini parsing: include diskN + parity*, exclude cache/flash/transfer_cache by name + non-rotational
+# returns: (file_mtime, awake_disks) - awake_disks is [(device, ini_temp), ...] of the spun-up disks
+def read_disks_ini(path: str) -> Tuple[float, List[Tuple[Optional[str], Optional[str]]]]:
+    awake: List[Tuple[Optional[str], Optional[str]]] = []
 
     cur_name = None
     cur_rot = None
@@ -260,42 +508,7 @@ def parse_disks_ini(path: str) -> Tuple[int, int, Optional[float], float, str]:
     cur_temp = None
     cur_dev = None
 
-    def get_smart_temp(dev: str) -> Optional[float]:
-        global _smart_permission_warned
-        try:
-            import subprocess
-            cmd = ["smartctl", "-n", "standby", "-A", f"/dev/{dev}"]
-            res = subprocess.run(cmd, capture_output=True, text=True, timeout=3)
-            
-            if res.returncode != 0: 
-                # Check for permission denied symptoms (including silent failure rc=2 in restricted envs)
-                perm_issue = False
-                if "Permission denied" in res.stderr or "Operation not permitted" in res.stderr:
-                    perm_issue = True
-                elif res.returncode == 2 and not res.stderr.strip():
-                    # Silent failure with rc=2 often happens in unprivileged containers
-                    perm_issue = True
-
-                if perm_issue and not _smart_permission_warned:
-                    log(f"SMART: Query failed (rc={res.returncode}, stderr='{res.stderr.strip()}'). If this persists for active drives, check Docker privileges (needs --privileged and /dev mapping).")
-                    _smart_permission_warned = True
-                return None
-            
-            for line in res.stdout.splitlines():
-                if "Temperature_Celsius" in line or "Airflow_Temperature_Cel" in line:
-                    parts = line.split()
-                    if len(parts) >= 10:
-                        try:
-                            return float(parts[9])
-                        except ValueError:
-                            continue
-            return None
-        except Exception as e:
-            log(f"SMART error for {dev}: {e}")
-            return None
-
     def flush():
-        nonlocal spinning, temps_seen, max_temp, cur_name, cur_rot, cur_spundown, cur_temp, cur_dev, source_flags
         if cur_name is None:
             return
         name = cur_name.lower()
@@ -309,81 +522,110 @@ def parse_disks_ini(path: str) -> Tuple[int, int, Optional[float], float, str]:
             
         # spundown="0" means spun up
         if str(cur_spundown) == "0":
-            spinning += 1
-            t = None
-            
-            # 1. Try SMART (real-time) if disk is awake
-            if cur_dev:
-                t = get_smart_temp(cur_dev)
-                if t is not None:
-                    source_flags.add("SMART")
-
-            # 2. Fallback to disks.ini if SMART failed or wasn't available
-            if t is None and cur_temp is not None and cur_temp != "*" and cur_temp != "":
-                try:
-                    import re
-                    match = re.search(r"(\d+\.?\d*)", str(cur_temp))
-                    if match:
-                        t = float(match.group(1))
-                        source_flags.add("INI")  # Only add if we actually used it
-                except Exception:
-                    pass
-            
-            if t is not None:
-                temps_seen += 1
-                if (max_temp is None) or (t > max_temp):
-                    max_temp = t
-
-    for ln in lines:
-        ln = ln.strip()
-        if ln.startswith('["') and ln.endswith('"]'):
-            flush()
-            cur_name = ln[2:-2]
-            cur_rot = cur_spundown = cur_temp = None
-            continue
-        if "=" not in ln:
-            continue
-        
-        # Handling key = "value" or key="value"
-        k, v = ln.split("=", 1)
-        k = k.strip().lower()
-        v = v.strip().strip('"')
+            awake.append((cur_dev, cur_temp))
+
+    try:
+        if not os.path.exists(path):
+            log(f"disks.ini not found at {path}")
+            return (0.0, [])
         
-        if k == "rotational":
-            cur_rot = v
-        elif k == "spundown":
-            cur_spundown = v
-        elif k in ("temp", "temperature"):
-            cur_temp = v
-        elif k == "device":
-            cur_dev = v
+        mtime = os.path.getmtime(path)
+        # Single pass over raw lines; only the values we keep get decoded
+        with open(path, "rb") as f:
+            for ln in f:
+                ln = ln.strip()
+                m = _SECTION_RE.fullmatch(ln) if ln.startswith(b"[") else None
+                if m:
+                    flush()
+                    cur_name = m.group(1).decode("utf-8", "ignore")
+                    cur_rot = cur_spundown = cur_temp = None
+                    continue
+
+                # Handling key = "value" or key="value"
+                k, sep, v = ln.partition(b"=")
+                if not sep:
+                    continue
+                k = k.strip().lower()
+                if k not in _INI_KEYS:
+                    continue
+                v = v.strip(b' \t"\r\n').decode("utf-8", "ignore")
+                
+                if k == b"rotational":
+                    cur_rot = v
+                elif k == b"spundown":
+                    cur_spundown = v
+                elif k == b"device":
+                    cur_dev = v
+                else:
+                    cur_temp = v
+    except Exception as e:
+        log(f"Error reading {path}: {e}")
+        return (0.0, [])
 
     flush()
+    return (mtime, awake)
+
+
+# returns: (temps_seen, max_temp_or_None, source_string) for the awake disks from read_disks_ini()
+def disk_temps(awake: List[Tuple[Optional[str], Optional[str]]]) -> Tuple[int, Optional[float], str]:
+    temps_seen = 0
+    max_temp: Optional[float] = None
+    source_flags = set() # {"SMART", "INI"}
+
+    # 1. Try SMART (real-time) for all awake disks at once - smartctl calls run in parallel
+    devs = [dev for dev, _ in awake if dev]
+    smart_temps = dict(zip(devs, _smart_pool.map(get_smart_temp, devs)))
+
+    for dev, ini_temp in awake:
+        t = smart_temps.get(dev) if dev else None
+        if t is not None:
+            source_flags.add("SMART")
+
+        # 2. Fallback to disks.ini if SMART failed or wasn't available
+        if t is None and ini_temp is not None and ini_temp != "*" and ini_temp != "":
+            # Usually a plain number; only fall back to the regex for values like "38 C"
+            try:
+                t = float(ini_temp)
+            except ValueError:
+                match = _TEMP_RE.search(ini_temp)
+                t = float(match.group(1)) if match else None
+            if t is not None and not math.isfinite(t):
+                t = None
+            if t is not None:
+                source_flags.add("INI")  # Only add if we actually used it
+        
+        if t is not None:
+            temps_seen += 1
+            if (max_temp is None) or (t > max_temp):
+                max_temp = t
+
     src_str = "/".join(sorted(list(source_flags))) if source_flags else "None"
-    return (spinning, temps_seen, max_temp, mtime, src_str)
+    return (temps_seen, max_temp, src_str)
+
+
+_point_temp = operator.itemgetter("temp_c")
 
 
 def clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
 
+# points must be sorted by temp_c - load_config() already does that for cfg["curve"]
 def curve_pwm(temp_c: float, points: List[Dict[str, Any]], mode: str) -> float:
-    pts = sorted(points, key=lambda x: x["temp_c"])
-    if temp_c <= pts[0]["temp_c"]:
-        return float(pts[0]["pwm"])
-    if temp_c >= pts[-1]["temp_c"]:
-        return float(pts[-1]["pwm"])
-    for i in range(1, len(pts)):
-        t0 = float(pts[i - 1]["temp_c"]); p0 = float(pts[i - 1]["pwm"])
-        t1 = float(pts[i]["temp_c"]);     p1 = float(pts[i]["pwm"])
-        if temp_c <= t1:
-            if mode == "steps":
-                return p0
-            if t1 == t0:
-                return p1
-            f = (temp_c - t0) / (t1 - t0)
-            return p0 + f * (p1 - p0)
-    return float(pts[-1]["pwm"])
+    if temp_c <= points[0]["temp_c"]:
+        return float(points[0]["pwm"])
+    if temp_c >= points[-1]["temp_c"]:
+        return float(points[-1]["pwm"])
+    # Segment end = first point with temp >= temp_c (1 <= i < len(points) after the checks above)
+    i = bisect.bisect_left(points, temp_c, key=_point_temp)
+    t0 = float(points[i - 1]["temp_c"]); p0 = float(points[i - 1]["pwm"])
+    t1 = float(points[i]["temp_c"]);     p1 = float(points[i]["pwm"])
+    if mode == "steps":
+        return p0
+    if t1 == t0:
+        return p1
+    f = (temp_c - t0) / (t1 - t0)
+    return p0 + f * (p1 - p0)
 
 
 _last_target_pwm: Optional[int] = None
@@ -428,29 +670,65 @@ def compute_target(cfg: Dict[str, Any], now: int, max_temp: Optional[float], spi
 mqtt_client: Optional[mqtt.Client] = None
 mqtt_connected = False
 stop_event = threading.Event()
+# Set by save_config() so mqtt_loop picks up new settings (poll_s, esp_ip, ...) right away
+wake_event = threading.Event()
+# mqtt_loop task intervals (s); the disks.ini poll interval comes from the config
+HISTORY_SAMPLE_S = 30
+ESP_CHECK_S = 5
+# Longest mqtt_loop sleep, so hand edits of config.json are still noticed quickly
+LOOP_MAX_SLEEP_S = 5
+MQTT_RETRY_S = 1
 
 
 def mqtt_on_connect(client, userdata, flags, rc, properties=None):
     global mqtt_connected
+    with state_lock:
+        mqtt_connected = (rc == 0)
+        _update_snapshot()
     if rc == 0:
-        mqtt_connected = True
         log("MQTT: Connected successfully")
     else:
-        mqtt_connected = False
         log(f"MQTT: Connection failed with result code {rc}")
 
 
 def mqtt_on_disconnect(client, userdata, rc):
     global mqtt_connected
-    mqtt_connected = False
+    with state_lock:
+        mqtt_connected = False
+        _update_snapshot()
     log(f"MQTT: Disconnected (rc={rc})")
 
 
+def esp_reachable(esp_ip: str) -> bool:
+    # Accepting a connection on the web server port is proof of life enough, no HTTP needed
+    host, _, port = esp_ip.partition(":")
+    try:
+        with socket.create_connection((host, int(port or 80)), timeout=1):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+def _update_snapshot() -> None:
+    # Call with state_lock held (it also keeps the mqtt_loop and MQTT callback writers apart)
+    global _snapshot
+    seq, connected, _, st = _snapshot
+    hist = tuple(state["history"])
+    snap = dict(state)
+    snap["history"] = hist
+    snap["updated_at_human"] = human_ts(state["updated_at"])
+    if snap != st or mqtt_connected != connected:
+        _snapshot = (seq + 1, mqtt_connected, hist, snap)
+
+
 def mqtt_loop():
     global mqtt_client, _last_target_pwm
     last_disks_poll = 0
     last_history_sample = 0
+    last_esp_check = 0
     last_ini_mtime = 0.0
+    last_ini_path = None
+    awake_disks: List[Tuple[Optional[str], Optional[str]]] = []
 
     while not stop_event.is_set():
         cfg = load_config()
@@ -460,9 +738,17 @@ def mqtt_loop():
         poll_s = int(cfg["unraid_disks_ini"].get("poll_s", 15))
         if now - last_disks_poll >= max(1, poll_s):
             last_disks_poll = now
-            spinning, temps_seen, max_temp, ini_mtime, src_str = parse_disks_ini(cfg["unraid_disks_ini"]["path"])
-            
-            last_ini_mtime = ini_mtime
+            ini_path = cfg["unraid_disks_ini"]["path"]
+            try:
+                ini_mtime = os.path.getmtime(ini_path)
+            except OSError:
+                ini_mtime = 0.0
+            # Unraid only rewrites disks.ini when disk state changes, reuse the last parse until then
+            if not ini_mtime or ini_mtime != last_ini_mtime or ini_path != last_ini_path:
+                last_ini_mtime, awake_disks = read_disks_ini(ini_path)
+                last_ini_path = ini_path
+            spinning = len(awake_disks)
+            temps_seen, max_temp, src_str = disk_temps(awake_disks)
 
             target_pwm, mode, source = compute_target(cfg, now, max_temp, spinning)
 
@@ -486,20 +772,26 @@ def mqtt_loop():
                 _last_target_pwm = int(target_pwm)
             
             # 2. Publish to MQTT (if available)
-            if mqtt_client is not None and mqtt_connected:
+            mc = mqtt_client
+            if mc is not None and mc.is_connected() and mc.want_write():
+                # Last round's packets are still unsent: the broker isn't keeping up, skip this round
+                # instead of piling more onto paho's (unbounded) outgoing queue; values are retained anyway
+                log("MQTT publish skipped: previous round still unsent")
+            elif mc is not None and mc.is_connected():
+                t = cfg["topics"]
+                lim = cfg.get("limits", {})
+                msgs = (
+                    (t["target_pwm"], str(int(target_pwm))),
+                    (t["min_pwm"], str(int(lim.get("min_pwm", 0)))),
+                    (t["max_pwm"], str(int(lim.get("max_pwm", 100)))),
+                    (t["bias_limit"], str(int(lim.get("bias_limit", 25)))),
+                    (t["spinning_disks"], str(int(spinning))),
+                    (t["updated_at"], str(int(now))),
+                    (t["max_temp"], "" if max_temp is None else f"{float(max_temp):.1f}"),
+                )
                 try:
-                    t = cfg["topics"]
-                    mqtt_client.publish(t["target_pwm"], str(int(target_pwm)), qos=0, retain=True)
-                    mqtt_client.publish(t["min_pwm"], str(int(cfg.get("limits", {}).get("min_pwm", 0))), qos=0, retain=True)
-                    mqtt_client.publish(t["max_pwm"], str(int(cfg.get("limits", {}).get("max_pwm", 100))), qos=0, retain=True)
-                    mqtt_client.publish(t["bias_limit"], str(int(cfg.get("limits", {}).get("bias_limit", 25))), qos=0, retain=True)
-                    mqtt_client.publish(t["spinning_disks"], str(int(spinning)), qos=0, retain=True)
-                    mqtt_client.publish(t["updated_at"], str(int(now)), qos=0, retain=True)
-
-                    if max_temp is None:
-                        mqtt_client.publish(t["max_temp"], "", qos=0, retain=True)
-                    else:
-                        mqtt_client.publish(t["max_temp"], f"{float(max_temp):.1f}", qos=0, retain=True)
+                    for topic, payload in msgs:
+                        mc.publish(topic, payload, qos=0, retain=True)
                 except Exception as e:
                     log(f"MQTT publish failed: {e}")
                     # don't reset client here, keep trying next poll
@@ -508,7 +800,7 @@ def mqtt_loop():
             log(f"Update: target_pwm={int(target_pwm)} mode={mode} spinning={spinning} max_temp={max_temp} ({src_str})")
 
         # 2. Sample History (every 30s)
-        if now - last_history_sample >= 30:
+        if now - last_history_sample >= HISTORY_SAMPLE_S:
             last_history_sample = now
             with state_lock:
                 if state["max_temp"] is not None:
@@ -517,19 +809,11 @@ def mqtt_loop():
                         "temp": float(state["max_temp"]),
                         "pwm": int(state["target_pwm"] or 0)
                     })
-                    # Keep max 60 samples (~30 min)
-                    state["history"] = state["history"][-60:]
 
-        # 3. Check ESP availability (via HTTP)
-        if cfg.get("esp_ip"):
-            try:
-                import urllib.request
-                # Set a very short timeout
-                with urllib.request.urlopen(f"http://{cfg['esp_ip']}/", timeout=2) as response:
-                    online = (response.status < 500) # Any response is good
-            except Exception:
-                online = False
-            
+        # 3. Check ESP availability (via TCP connect)
+        if cfg.get("esp_ip") and now - last_esp_check >= ESP_CHECK_S:
+            last_esp_check = now
+            online = esp_reachable(cfg["esp_ip"])
             with state_lock:
                 state["esp_online"] = online
 
@@ -547,12 +831,32 @@ def mqtt_loop():
                 log(f"MQTT connect failed: {e}")
                 mqtt_client = None
 
-        # 4. Update age (every second)
+        # 4. Hand a fresh snapshot to the UI (updated_age_s is computed when it is read)
         with state_lock:
-            if state["updated_at"] is not None:
-                state["updated_age_s"] = int(now - state["updated_at"])
+            _update_snapshot()
 
-        time.sleep(1)
+        # Sleep until the next task is due; a settings save wakes us early
+        deadlines = [last_disks_poll + max(1, poll_s), last_history_sample + HISTORY_SAMPLE_S,
+                     time.time() + LOOP_MAX_SLEEP_S]
+        if cfg.get("esp_ip"):
+            deadlines.append(last_esp_check + ESP_CHECK_S)
+        if mqtt_client is None:
+            deadlines.append(time.time() + MQTT_RETRY_S)
+        wake_event.wait(max(0.05, min(deadlines) - time.time()))
+        wake_event.clear()
+
+
+# Curve graph: data ranges and plot margins (left, right, top, bottom)
+GRAPH_X_RANGE = (10.0, 60.0)
+GRAPH_Y_RANGE = (0.0, 100.0)
+GRAPH_MARGINS = (54, 18, 14, 48)
+_GRAPH_STYLE = """<style>
+    .grid-line { stroke: rgba(255,255,255,0.05); stroke-width: 1; }
+    .current-temp-line { stroke: rgba(231,76,60,0.5); stroke-width: 1.5; stroke-dasharray: 4 2; }
+    .point-node { fill: var(--mid); stroke: #fff; stroke-width: 1.5; cursor: grab; }
+    .point-node:hover { r: 8; stroke-width: 2; }
+    .point-node.dragging { cursor: grabbing; fill: #fff; stroke: var(--mid); }
+  </style>"""
 
 
 def svg_graph(cfg: Dict[str, Any], current_temp: Optional[float] = None, width: int = 640, height: int = 260) -> str:
@@ -561,18 +865,43 @@ def svg_graph(cfg: Dict[str, Any], current_temp: Optional[float] = None, width:
         return ""
     mode = cfg.get("curve_mode", "linear")
 
-    x_min, x_max = 10.0, 60.0
-    y_min, y_max = 0.0, 100.0
+    # Only the marker depends on the current temp, everything else is cached per curve/mode/size
+    base = _svg_curve_base(tuple((p["temp_c"], p["pwm"]) for p in pts), mode, width, height)
+    if base is None:
+        return ""
+    head, tail = base
+
+    x_min, x_max = GRAPH_X_RANGE
+    left_m, right_m, top_m, bottom_m = GRAPH_MARGINS
+    plot_w = width - left_m - right_m
+    axis_y1 = height - bottom_m
+
+    current_line = ""
+    if current_temp is not None:
+        try:
+            cx = left_m + (float(current_temp) - x_min) / (x_max - x_min) * plot_w
+            if left_m <= cx <= left_m + plot_w:
+                current_line = f'<line x1="{cx:.1f}" y1="{top_m:.1f}" x2="{cx:.1f}" y2="{axis_y1:.1f}" class="current-temp-line" />'
+        except Exception:
+            pass
+
+    return head + current_line + tail
 
-    left_m = 54
-    right_m = 18
-    top_m = 14
-    bottom_m = 48
+
+@functools.lru_cache(maxsize=8)
+def _svg_curve_base(curve: Tuple[Tuple[float, int], ...], mode: str, width: int, height: int) -> Optional[Tuple[str, str]]:
+    # Markup before and after the current-temp marker, or None if the plot area is too small
+    pts = [{"temp_c": t, "pwm": p} for t, p in curve]
+
+    x_min, x_max = GRAPH_X_RANGE
+    y_min, y_max = GRAPH_Y_RANGE
+
+    left_m, right_m, top_m, bottom_m = GRAPH_MARGINS
 
     plot_w = width - left_m - right_m
     plot_h = height - top_m - bottom_m
     if plot_w <= 10 or plot_h <= 10:
-        return ""
+        return None
 
     def sx(x: float) -> float:
         return left_m + (float(x) - x_min) / (x_max - x_min) * plot_w
@@ -580,31 +909,35 @@ def svg_graph(cfg: Dict[str, Any], current_temp: Optional[float] = None, width:
     def sy(y: float) -> float:
         return top_m + (1 - (float(y) - y_min) / (y_max - y_min)) * plot_h
 
-    # Grid lines
-    grid = []
-    # Vertical grid (every 5°C)
-    for x in range(int(x_min), int(x_max) + 1, 5):
-        pos = sx(x)
-        grid.append(f'<line x1="{pos:.1f}" y1="{top_m:.1f}" x2="{pos:.1f}" y2="{top_m + plot_h:.1f}" class="grid-line" />')
-    # Horizontal grid (every 5%)
-    for y in range(int(y_min), int(y_max) + 1, 5):
-        pos = sy(y)
-        grid.append(f'<line x1="{left_m:.1f}" y1="{pos:.1f}" x2="{left_m + plot_w:.1f}" y2="{pos:.1f}" class="grid-line" />')
+    frame_pre, frame_post = _DEFAULT_FRAME if (width, height) == (640, 260) else _svg_frame(width, height)
 
     samples: List[Tuple[float, float]] = []
     if mode == "linear":
+        # xs are ascending, so walk them and the curve segments together in one pass
+        # (same interpolation as curve_pwm, without a lookup per sample)
         xs = [x_min + i * (x_max - x_min) / 160 for i in range(161)]
+        temps = [float(t) for t, _ in curve]
+        pwms = [float(p) for _, p in curve]
+        last = len(curve) - 1
+        j = 1
         for x in xs:
-            y = curve_pwm(x, pts, "linear")
+            if x <= temps[0]:
+                y = pwms[0]
+            elif x >= temps[last]:
+                y = pwms[last]
+            else:
+                while x > temps[j]:
+                    j += 1
+                t0, t1 = temps[j - 1], temps[j]
+                y = pwms[j] if t1 == t0 else pwms[j - 1] + (x - t0) / (t1 - t0) * (pwms[j] - pwms[j - 1])
             samples.append((sx(x), sy(y)))
     else:
-        spts = sorted(pts, key=lambda p: p["temp_c"])
-        for i in range(len(spts) - 1):
-            x0, y0 = float(spts[i]["temp_c"]), float(spts[i]["pwm"])
-            x1 = float(spts[i + 1]["temp_c"])
+        for i in range(len(pts) - 1):
+            x0, y0 = float(pts[i]["temp_c"]), float(pts[i]["pwm"])
+            x1 = float(pts[i + 1]["temp_c"])
             samples.append((sx(x0), sy(y0)))
             samples.append((sx(x1), sy(y0)))
-        samples.append((sx(float(spts[-1]["temp_c"])), sy(float(spts[-1]["pwm"]))))
+        samples.append((sx(float(pts[-1]["temp_c"])), sy(float(pts[-1]["pwm"]))))
 
     pl = " ".join(f"{x:.1f},{y:.1f}" for x, y in samples)
     circles = "\n".join(
@@ -612,6 +945,46 @@ def svg_graph(cfg: Dict[str, Any], current_temp: Optional[float] = None, width:
         for i, p in enumerate(pts)
     )
 
+    # Parts are joined with the line indent; the current-temp marker goes between head and tail
+    head = "\n  ".join((
+        f'<svg id="curve-svg" viewBox="0 0 {width} {height}" width="100%" height="{height}" xmlns="http://www.w3.org/2000/svg" class="graph"\n'
+        f'  data-xmin="{x_min}" data-xmax="{x_max}" data-ymin="{y_min}" data-ymax="{y_max}"\n'
+        f'  data-left="{left_m}" data-right="{right_m}" data-top="{top_m}" data-bottom="{bottom_m}"\n'
+        f'  data-width="{width}" data-height="{height}" data-mode="{mode}">',
+        _GRAPH_STYLE,
+        frame_pre,
+        f'<polyline points="{pl}" fill="none" class="curve-line"/>',
+        "",
+    ))
+    tail = "\n  ".join(("", circles, frame_post)) + "\n</svg>"
+    return (head, tail)
+
+
+def _svg_frame(width: int, height: int) -> Tuple[str, str]:
+    # Size-only parts of the curve graph: (grid + axes + ticks, axis labels)
+    x_min, x_max = GRAPH_X_RANGE
+    y_min, y_max = GRAPH_Y_RANGE
+    left_m, right_m, top_m, bottom_m = GRAPH_MARGINS
+    plot_w = width - left_m - right_m
+    plot_h = height - top_m - bottom_m
+
+    def sx(x: float) -> float:
+        return left_m + (float(x) - x_min) / (x_max - x_min) * plot_w
+
+    def sy(y: float) -> float:
+        return top_m + (1 - (float(y) - y_min) / (y_max - y_min)) * plot_h
+
+    # Grid lines
+    grid = []
+    # Vertical grid (every 5°C)
+    for x in range(int(x_min), int(x_max) + 1, 5):
+        pos = sx(x)
+        grid.append(f'<line x1="{pos:.1f}" y1="{top_m:.1f}" x2="{pos:.1f}" y2="{top_m + plot_h:.1f}" class="grid-line" />')
+    # Horizontal grid (every 5%)
+    for y in range(int(y_min), int(y_max) + 1, 5):
+        pos = sy(y)
+        grid.append(f'<line x1="{left_m:.1f}" y1="{pos:.1f}" x2="{left_m + plot_w:.1f}" y2="{pos:.1f}" class="grid-line" />')
+
     axis_y0 = top_m
     axis_y1 = top_m + plot_h
     axis_x0 = left_m
@@ -639,79 +1012,90 @@ def svg_graph(cfg: Dict[str, Any], current_temp: Optional[float] = None, width:
     ylab_y = (axis_y0 + axis_y1) / 2
     ylabel = f'<text x="{ylab_x:.1f}" y="{ylab_y:.1f}" text-anchor="middle" font-size="10" font-weight="bold" transform="rotate(-90 {ylab_x:.1f} {ylab_y:.1f})">PWM (%)</text>'
 
-    current_line = ""
-    if current_temp is not None:
-        try:
-            cx = sx(float(current_temp))
-            if left_m <= cx <= axis_x1:
-                current_line = f'<line x1="{cx:.1f}" y1="{top_m:.1f}" x2="{cx:.1f}" y2="{axis_y1:.1f}" class="current-temp-line" />'
-        except Exception:
-            pass
+    pre = "\n  ".join((
+        " ".join(grid),
+        f'<line x1="{axis_x0:.1f}" y1="{axis_y0:.1f}" x2="{axis_x0:.1f}" y2="{axis_y1:.1f}" class="axis"/>',
+        f'<line x1="{axis_x0:.1f}" y1="{axis_y1:.1f}" x2="{axis_x1:.1f}" y2="{axis_y1:.1f}" class="axis"/>',
+        xticks,
+        yticks,
+    ))
+    return (pre, "\n  ".join((xlabel, ylabel)))
+
+
+# Frame for the default graph size (svg_graph's width/height defaults), built once at import
+_DEFAULT_FRAME = _svg_frame(640, 260)
+
+
+_HISTORY_STYLE = """<style>
+    .h-temp { stroke: #e74c3c; stroke-width: 1.4; fill: none; }
+    .h-pwm { stroke: var(--mid); stroke-width: 1.4; fill: none; }
+    .text-pwm { fill: var(--mid); }
+    .h-label-x { fill: rgba(255,255,255,0.6); font-size: 8px; }
+    .h-label-y { fill: rgba(255,255,255,0.7); font-size: 9px; }
+    .h-bg { fill: none; }
+    .h-grid { stroke: rgba(255,255,255,0.15); stroke-width: 0.8; stroke-dasharray: 2 2; }
+  </style>"""
+
+
+# History graph: always 60 slots (one sample every 30s), the newest sample on the right
+HISTORY_SLOTS = 60
 
-    return f'''
-<svg id="curve-svg" viewBox="0 0 {width} {height}" width="100%" height="{height}" xmlns="http://www.w3.org/2000/svg" class="graph"
-  data-xmin="{x_min}" data-xmax="{x_max}" data-ymin="{y_min}" data-ymax="{y_max}"
-  data-left="{left_m}" data-right="{right_m}" data-top="{top_m}" data-bottom="{bottom_m}"
-  data-width="{width}" data-height="{height}" data-mode="{mode}">
-  <style>
-    .grid-line {{ stroke: rgba(255,255,255,0.05); stroke-width: 1; }}
-    .current-temp-line {{ stroke: rgba(231,76,60,0.5); stroke-width: 1.5; stroke-dasharray: 4 2; }}
-    .point-node {{ fill: var(--mid); stroke: #fff; stroke-width: 1.5; cursor: grab; }}
-    .point-node:hover {{ r: 8; stroke-width: 2; }}
-    .point-node.dragging {{ cursor: grabbing; fill: #fff; stroke: var(--mid); }}
-  </style>
-  {" ".join(grid)}
-  <line x1="{axis_x0:.1f}" y1="{axis_y0:.1f}" x2="{axis_x0:.1f}" y2="{axis_y1:.1f}" class="axis"/>
-  <line x1="{axis_x0:.1f}" y1="{axis_y1:.1f}" x2="{axis_x1:.1f}" y2="{axis_y1:.1f}" class="axis"/>
-  {xticks}
-  {yticks}
-  <polyline points="{pl}" fill="none" class="curve-line"/>
-  {current_line}
-  {circles}
-  {xlabel}
-  {ylabel}
-</svg>
-'''.strip()
-
-
-def svg_history(history: List[Dict[str, Any]], width: int = 1200, height: int = 100) -> str:
-    # History card styling: we want the right side to be the "now"
-    padding_x = 80 # a lot of room for Y labels to clear the clipping edge
-    padding_y = 12
-    right_gutter = 60 # move the rightmost clock label far inward
-    gw = width - padding_x - right_gutter
-    gh = height - (padding_y * 2) - 8 # room for X labels (time)
 
+def svg_history(history: Sequence[Dict[str, Any]], width: int = 1200, height: int = 100) -> str:
     if not history:
         return f'<svg viewBox="0 0 {width} {height}" class="h-graph"><text x="50%" y="50%" text-anchor="middle" fill="#888" font-size="12">waiting for data...</text></svg>'
 
+    slot_xs, grid_y, y_base, gh = _svg_history_frame(width, height)
+
     # Internal coordinate system: 0-100 for data
     # 1°C = 2 units (so 50°C = 100 units)
     # 1% PWM = 1 unit
-    
-    def sy(val: float) -> float:
-        return padding_y + gh - (clamp(val, 0, 100) / 100.0 * gh)
+    # y = y_base - clamp(value, 0, 100) / 100 * gh
+
+    if len(history) > HISTORY_SLOTS:
+        history = list(history)[-HISTORY_SLOTS:]
 
-    # We always show 60 slots. If we have fewer, we shift them to the right.
-    max_slots = 60
-    dx = gw / (max_slots - 1)
-    
     pts_temp = []
     pts_pwm = []
     labels_x = []
     
-    # Calculate offset to align right (the last item in history is index 59)
-    offset = max_slots - len(history)
+    # Calculate offset to align right (the last item in history is slot 59)
+    offset = HISTORY_SLOTS - len(history)
     
-    for i, d in enumerate(history):
-        x = padding_x + (i + offset) * dx
-        pts_temp.append(f"{x:.1f},{sy(d['temp'] * 2):.1f}")
-        pts_pwm.append(f"{x:.1f},{sy(d['pwm']):.1f}")
+    for k, d in enumerate(history, offset):
+        x = slot_xs[k]
+        pts_temp.append(f"{x},{y_base - clamp(d['temp'] * 2, 0, 100) / 100.0 * gh:.1f}")
+        pts_pwm.append(f"{x},{y_base - clamp(d['pwm'], 0, 100) / 100.0 * gh:.1f}")
         
         # X-Labels (Time) - every 15 samples (~7.5 min)
-        if (i + offset) % 15 == 0 or i == len(history) - 1:
+        if k % 15 == 0 or k == HISTORY_SLOTS - 1:
             dt = datetime.fromtimestamp(d['ts']).strftime('%H:%M')
-            labels_x.append(f'<text x="{x:.1f}" y="{height - 2}" text-anchor="middle" class="h-label-x">{dt}</text>')
+            labels_x.append(f'<text x="{x}" y="{height - 2}" text-anchor="middle" class="h-label-x">{dt}</text>')
+
+    return "\n  ".join((
+        f'<svg viewBox="0 0 {width} {height}" preserveAspectRatio="none" class="h-graph" xmlns="http://www.w3.org/2000/svg">',
+        _HISTORY_STYLE,
+        grid_y,
+        f'<polyline points="{" ".join(pts_pwm)}" class="h-pwm" />',
+        f'<polyline points="{" ".join(pts_temp)}" class="h-temp" />',
+        " ".join(labels_x),
+    )) + "\n</svg>"
+
+
+@functools.lru_cache(maxsize=4)
+def _svg_history_frame(width: int, height: int) -> Tuple[Tuple[str, ...], str, float, float]:
+    # Size-only parts of the history graph: formatted x of every slot, the y grid + labels,
+    # and y_base/gh for mapping data values to y
+    # History card styling: we want the right side to be the "now"
+    padding_x = 80 # a lot of room for Y labels to clear the clipping edge
+    padding_y = 12
+    right_gutter = 60 # move the rightmost clock label far inward
+    gw = width - padding_x - right_gutter
+    gh = height - (padding_y * 2) - 8 # room for X labels (time)
+    y_base = padding_y + gh
+
+    dx = gw / (HISTORY_SLOTS - 1)
+    slot_xs = tuple(f"{padding_x + k * dx:.1f}" for k in range(HISTORY_SLOTS))
 
     # Y-Labels and Grid
     grid_y = []
@@ -722,30 +1106,38 @@ def svg_history(history: List[Dict[str, Any]], width: int = 1200, height: int =
         (100, "50°C", "100%")
     ]
     for val, t_lab, p_lab in y_marks:
-        y_pos = sy(val)
+        y_pos = y_base - val / 100.0 * gh
         grid_y.append(f'<line x1="{padding_x}" y1="{y_pos:.1f}" x2="{width-10}" y2="{y_pos:.1f}" class="h-grid" />')
         label_html = f'<text x="{padding_x-5}" y="{y_pos+3:.1f}" text-anchor="end" class="h-label-y">' \
                      f'<tspan fill="#e74c3c">{t_lab}</tspan> <tspan fill="rgba(255,255,255,0.2)">/</tspan> ' \
                      f'<tspan class="text-pwm">{p_lab}</tspan></text>'
         grid_y.append(label_html)
 
-    return f'''
-<svg viewBox="0 0 {width} {height}" preserveAspectRatio="none" class="h-graph" xmlns="http://www.w3.org/2000/svg">
-  <style>
-    .h-temp {{ stroke: #e74c3c; stroke-width: 1.4; fill: none; }}
-    .h-pwm {{ stroke: var(--mid); stroke-width: 1.4; fill: none; }}
-    .text-pwm {{ fill: var(--mid); }}
-    .h-label-x {{ fill: rgba(255,255,255,0.6); font-size: 8px; }}
-    .h-label-y {{ fill: rgba(255,255,255,0.7); font-size: 9px; }}
-    .h-bg {{ fill: none; }}
-    .h-grid {{ stroke: rgba(255,255,255,0.15); stroke-width: 0.8; stroke-dasharray: 2 2; }}
-  </style>
-  {" ".join(grid_y)}
-  <polyline points="{" ".join(pts_pwm)}" class="h-pwm" />
-  <polyline points="{" ".join(pts_temp)}" class="h-temp" />
-  {" ".join(labels_x)}
-</svg>
-'''.strip()
+    return (slot_xs, " ".join(grid_y), y_base, gh)
+
+
+# Last rendered history graph: samples only arrive every 30s, the UI polls much more often
+_h_svg_cache: Tuple[Any, str] = (None, "")
+
+
+def _history_svg(history: Sequence[Dict[str, Any]]) -> str:
+    global _h_svg_cache
+    key = (len(history), history[-1]["ts"] if history else None)
+    cached_key, svg = _h_svg_cache
+    if cached_key != key:
+        svg = svg_history(history)
+        _h_svg_cache = (key, svg)
+    return svg
+
+
+def _ui_status(st: Dict[str, Any]) -> Dict[str, Any]:
+    # Copy of a snapshot's status with the age filled in at read time
+    st = dict(st)
+    if st.get("updated_at"):
+        st["updated_age_s"] = max(0, int(time.time()) - int(st["updated_at"]))
+    else:
+        st["updated_age_s"] = None
+    return st
 
 
 @app.route("/favicon.ico")
@@ -758,17 +1150,11 @@ def favicon():
 @app.route("/", methods=["GET"])
 def index():
     cfg = load_config()
-    now = int(time.time())
-    with state_lock:
-        st = dict(state)
-        st["updated_at_human"] = human_ts(st.get("updated_at"))
-        if st.get("updated_at"):
-            st["updated_age_s"] = max(0, now - int(st["updated_at"]))
-        else:
-            st["updated_age_s"] = None
+    _, connected, hist, st = _snapshot
+    st = _ui_status(st)
 
     with log_lock:
-        log_text = "\n".join(log_lines[-120:])
+        log_text = "\n".join(log_lines)
 
     return render_template(
         TEMPLATE_NAME,
@@ -776,105 +1162,123 @@ def index():
         tz_name=TZ_NAME,
         status=st,
         cfg=cfg,
-        mqtt_connected=mqtt_connected,
+        mqtt_connected=connected,
         svg=svg_graph(cfg, st.get("max_temp")),
-        h_svg=svg_history(st.get("history", [])),
+        h_svg=_history_svg(hist),
         log_text=log_text,
-        log_count=min(len(log_lines), 120),
-        config_json=json.dumps(cfg, indent=2, sort_keys=True),
+        log_count=len(log_lines),
+        config_json=_dumps(cfg),
     )
     
 
 @app.route("/api/status", methods=["GET"])
 def api_status():
-    with state_lock:
-        st = dict(state)
-        # Add human timestamp for UI
-        if st.get("updated_at"):
-            st["updated_at_human"] = human_ts(st["updated_at"])
-        else:
-            st["updated_at_human"] = "None"
-        history_list = list(state.get("history", []))
+    seq, connected, hist, st = _snapshot
+    # _log_seq is read before the log lines, so the tag can only be older than the body, never newer
+    etag = f"{_ETAG_BOOT}-{seq}-{_log_seq}"
+    if etag in request.if_none_match:
+        # Nothing changed since this client's last poll; the UI ticks updated_age_s itself
+        resp = app.response_class(status=304)
+    else:
+        st = _ui_status(st)
+
+        with log_lock:
+            log_text = "\n".join(log_lines)
+
+        resp = jsonify({
+            "status": st,
+            "mqtt_connected": connected,
+            "h_svg": _history_svg(hist),
+            "log_text": log_text,
+        })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+# save_settings form fields: (form key, path into cfg, keep old value if empty)
+_STR_FORM_FIELDS = (
+    ("mqtt_host", ("mqtt", "host"), True),
+    ("esp_ip", ("esp_ip",), False),
+    ("mqtt_username", ("mqtt", "username"), False),
+) + tuple((f"topic_{k}", ("topics", k), True) for k in TOPIC_KEYS)
+
+# save_settings form fields parsed as int: (form key, path into cfg)
+_INT_FORM_FIELDS = (
+    ("mqtt_port", ("mqtt", "port")),
+    ("publish_interval_s", ("publish_interval_s",)),
+    ("ui_refresh_s", ("ui_refresh_s",)),
+    ("disks_poll_s", ("unraid_disks_ini", "poll_s")),
+    ("min_pwm", ("limits", "min_pwm")),
+    ("max_pwm", ("limits", "max_pwm")),
+    ("bias_limit", ("limits", "bias_limit")),
+    ("hysteresis_up", ("hysteresis_up",)),
+    ("hysteresis_down", ("hysteresis_down",)),
+    ("all_spun_down_after_pwm", ("all_spun_down", "after_pwm")),
+)
+
+
+def _curve_sorted(pts: List[Dict[str, Any]]) -> bool:
+    return all(a["temp_c"] <= b["temp_c"] for a, b in zip(pts, pts[1:]))
 
-    with log_lock:
-        log_text = "\n".join(log_lines[-120:])
 
-    return jsonify({
-        "status": st,
-        "mqtt_connected": mqtt_connected,
-        "h_svg": svg_history(history_list),
-        "log_text": log_text,
-    })
+def _set_cfg(cfg: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+    d = cfg
+    for k in path[:-1]:
+        d = d[k]
+    d[path[-1]] = value
 
 
 @app.route("/save_settings", methods=["POST"])
 def save_settings():
-    cfg = load_config()
-
-    # Network / MQTT
-    if "mqtt_host" in request.form:
-        cfg["mqtt"]["host"] = request.form.get("mqtt_host", "").strip() or cfg["mqtt"]["host"]
-    if "esp_ip" in request.form:
-        cfg["esp_ip"] = request.form.get("esp_ip", "").strip()
-    if "mqtt_port" in request.form:
-        try:
-            cfg["mqtt"]["port"] = int(float(request.form.get("mqtt_port")))
-        except Exception:
-            pass
-    if "mqtt_username" in request.form:
-        cfg["mqtt"]["username"] = request.form.get("mqtt_username", "").strip()
-    if "mqtt_password" in request.form:
-        new_pw = request.form.get("mqtt_password", "").strip()
+    cfg = copy.deepcopy(load_config())
+    form = request.form
+    form_get = form.get
+    form_getlist = form.getlist
+
+    # Network / MQTT, topics (editable but low-priority), esp_ip
+    for form_k, path, skip_empty in _STR_FORM_FIELDS:
+        v = form_get(form_k)
+        if v is None:
+            continue
+        v = v.strip()
+        if v or not skip_empty:
+            _set_cfg(cfg, path, v)
+    new_pw = form_get("mqtt_password")
+    if new_pw is not None:
+        new_pw = new_pw.strip()
         if new_pw and new_pw != "**********":
             cfg["mqtt"]["password"] = new_pw
         elif not new_pw:
             cfg["mqtt"]["password"] = ""
 
-    # Topics (editable but low-priority)
-    for k in ("target_pwm", "min_pwm", "max_pwm", "max_temp", "spinning_disks", "updated_at", "bias_limit"):
-        form_k = f"topic_{k}"
-        if form_k in request.form:
-            v = request.form.get(form_k, "").strip()
-            if v:
-                cfg["topics"][k] = v
-
-    # General
-    if "publish_interval_s" in request.form:
-        try:
-            cfg["publish_interval_s"] = int(float(request.form.get("publish_interval_s")))
-        except Exception:
-            pass
-
-    if "ui_refresh_s" in request.form:
-        try:
-            cfg["ui_refresh_s"] = int(float(request.form.get("ui_refresh_s")))
-        except Exception:
-            pass
-
-    # disks.ini poll only (path stays hardcoded)
-    if "disks_poll_s" in request.form:
+    # Numbers: port, intervals, disks.ini poll (path stays hardcoded), limits, hysteresis, all spun down
+    for form_k, path in _INT_FORM_FIELDS:
+        v = form_get(form_k)
+        if v is None:
+            continue
         try:
-            cfg["unraid_disks_ini"]["poll_s"] = int(float(request.form.get("disks_poll_s")))
-        except Exception:
+            _set_cfg(cfg, path, int(float(v)))
+        except (TypeError, ValueError, OverflowError):
             pass
 
     # Curve
-    mode = request.form.get("curve_mode", cfg.get("curve_mode", "linear"))
+    mode = form_get("curve_mode", cfg.get("curve_mode", "linear"))
     cfg["curve_mode"] = mode if mode in ("linear", "steps") else "linear"
 
-    temps = request.form.getlist("curve_temp")
-    pwms = request.form.getlist("curve_pwm")
     pts = []
-    for t, p in zip(temps, pwms):
+    for t, p in zip(form_getlist("curve_temp"), form_getlist("curve_pwm")):
         try:
             pts.append({"temp_c": float(t), "pwm": int(float(p))})
-        except Exception:
+        except (TypeError, ValueError, OverflowError):
             pass
 
-    if request.form.get("add_point") == "1":
-        pts.append({"temp_c": 55.0, "pwm": 100})
+    added = None
+    if form_get("add_point") == "1":
+        added = {"temp_c": 55.0, "pwm": 100}
+        pts.append(added)
 
-    del_idx = request.form.get("delete_idx")
+    del_idx = form_get("delete_idx")
     if del_idx is not None:
         try:
             di = int(del_idx)
@@ -884,36 +1288,21 @@ def save_settings():
             pass
 
     if pts:
-        pts.sort(key=lambda x: x["temp_c"])
+        # Rows come back in curve order, so usually only a new point is out of place
+        if added is not None and pts[-1] is added and _curve_sorted(pts[:-1]):
+            bisect.insort(pts, pts.pop(), key=_point_temp)
+        elif not _curve_sorted(pts):
+            pts.sort(key=_point_temp)
         cfg["curve"] = pts
 
-    # Limits
-    for k in ("min_pwm", "max_pwm", "bias_limit"):
-        if k in request.form:
-            try:
-                cfg["limits"][k] = int(float(request.form.get(k)))
-            except Exception:
-                pass
-    if "hysteresis_up" in request.form:
-        try:
-            cfg["hysteresis_up"] = int(float(request.form.get("hysteresis_up")))
-        except Exception:
-            pass
-    if "hysteresis_down" in request.form:
-        try:
-            cfg["hysteresis_down"] = int(float(request.form.get("hysteresis_down")))
-        except Exception:
-            pass
-
     # All spun down
-    cfg["all_spun_down"]["enabled"] = (request.form.get("all_spun_down_enabled") == "on")
-    if "all_spun_down_after_pwm" in request.form:
-        try:
-            cfg["all_spun_down"]["after_pwm"] = int(float(request.form.get("all_spun_down_after_pwm")))
-        except Exception:
-            pass
+    cfg["all_spun_down"]["enabled"] = (form_get("all_spun_down_enabled") == "on")
 
-    atomic_write(CONFIG_PATH, json.dumps(cfg, indent=2, sort_keys=True) + "\n")
+    payload = _dump_bytes(cfg)
+    if config_unchanged(payload):
+        # Nothing changed - skip the write (and its fsyncs)
+        return redirect(url_for("index"))
+    save_config(payload)
     log("config.json saved via UI (Save settings)")
     return redirect(url_for("index"))
 
@@ -922,15 +1311,18 @@ def save_settings():
 def save_json():
     txt = request.form.get("config_json", "")
     try:
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         if not isinstance(parsed, dict):
             raise ValueError("Top-level JSON must be an object")
         # compat: topics.base_pwm -> topics.target_pwm
         if "topics" in parsed and isinstance(parsed["topics"], dict):
             if "base_pwm" in parsed["topics"] and "target_pwm" not in parsed["topics"]:
                 parsed["topics"]["target_pwm"] = parsed["topics"].pop("base_pwm")
-        atomic_write(CONFIG_PATH, json.dumps(parsed, indent=2, sort_keys=True) + "\n")
-        log("config.json saved via raw JSON")
+        payload = _dump_bytes(parsed)
+        load_config() # make sure the cached hash belongs to the current file
+        if not config_unchanged(payload):
+            save_config(payload)
+            log("config.json saved via raw JSON")
     except Exception as e:
         log(f"raw JSON save failed: {e}")
     return redirect(url_for("index"))
@@ -942,6 +1334,13 @@ def start():
     log(f"UI listening on 0.0.0.0:8088 (TZ={TZ_NAME})")
 
 
+def _on_sigterm(signum, frame):
+    # docker stop sends SIGTERM, which PID 1 would otherwise ignore until SIGKILL;
+    # exit normally instead so atexit still flushes queued config.json writes
+    raise SystemExit(0)
+
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _on_sigterm)
     start()
     app.run(host="0.0.0.0", port=8088, debug=False)